@@ -3,7 +3,15 @@ import math
 from datetime import datetime, date, time, timedelta, timezone
 import zoneinfo
 import pandas as pd
+import numpy as np
 import io
+import csv
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet/Arrow export is optional
+    pa = None
+    pq = None
 # Helper functions
 def mod360(x):
     return (x % 360 + 360) % 360
@@ -190,6 +198,44 @@ def get_transit_predictions(current_positions, birth_positions):
         house = math.floor((current_long - birth_long) % 360 / 30) + 1
         predictions.append(f"{planet} is transiting the {house}th house from Moon.")
     return predictions
+# Transit forecast: one shared transit table broadcast against many natal Moons
+transit_planets = ['Sun', 'Moon', 'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Rahu', 'Ketu']
+sade_sati_houses = [12, 1, 2]
+jupiter_good_houses = [2, 5, 7, 9, 11]
+def get_transit_table(start_jd, days, step=1):
+    jds = start_jd + np.arange(0, days, step, dtype=float)
+    table = np.empty((len(jds), len(transit_planets)))
+    for i, jd in enumerate(jds):
+        d = jd - 2451545.0
+        positions = PlanetaryPositions(d).get_positions(get_ayanamsa_lahiri(d))
+        table[i] = [positions[p] for p in transit_planets]
+    return jds, table
+class TransitForecast:
+    __slots__ = ("jds", "houses", "sade_sati", "jupiter_favourable")
+    def __init__(self, jds, transit_table, natal_moons):
+        self.jds = jds
+        moon_rashi = np.floor(np.asarray(natal_moons, dtype=float) / 30).astype(np.int8)
+        transit_rashi = np.floor(transit_table / 30).astype(np.int8)
+        # houses[date, planet, user], counted from the natal Moon rashi
+        self.houses = (transit_rashi[:, :, None] - moon_rashi[None, None, :]) % 12 + 1
+        self.sade_sati = np.isin(self.houses[:, transit_planets.index('Saturn')], sade_sati_houses)
+        self.jupiter_favourable = np.isin(self.houses[:, transit_planets.index('Jupiter')], jupiter_good_houses)
+    def rows(self, user_ids=None):
+        n_users = self.houses.shape[2]
+        if user_ids is None:
+            user_ids = range(n_users)
+        user_ids = [str(u) for u in user_ids]
+        for i, jd in enumerate(self.jds.tolist()):
+            houses = self.houses[i].T.tolist()
+            sade_sati = self.sade_sati[i].tolist()
+            jupiter = self.jupiter_favourable[i].tolist()
+            for u in range(n_users):
+                yield (user_ids[u], jd, *houses[u], sade_sati[u], jupiter[u])
+    def to_dataframe(self, user_ids=None):
+        return pd.DataFrame(list(self.rows(user_ids)), columns=[name for name, _ in transit_schema])
+def forecast_transits(natal_moons, start_jd, days=365, step=1):
+    jds, table = get_transit_table(start_jd, days, step)
+    return TransitForecast(jds, table, natal_moons)
 def get_aspects(planets):
     aspects = []
     aspect_angles = {0: 'Conjunction', 60: 'Sextile', 90: 'Square', 120: 'Trine', 180: 'Opposition'}
@@ -425,55 +471,74 @@ def bhakoot_score(r_b, r_g):
 nadi_nak = [1,2,3,2,1,1,2,2,2,1,2,3,1,1,3,2,2,2,1,2,3,1,1,1,2,2,3]
 def nadi_score(n_b, n_g):
     return 8 if nadi_nak[n_b-1] != nadi_nak[n_g-1] else 0
+koota_names = list(max_points)
+guna_columns = ["#", "Guna", "Girl 👰", "Boy 🤵", "Obtained Point 🎯", "Maximum Point 📈", "Area Of Life 🌍"]
+def format_points(x):
+    return int(x) if x == int(x) else x
+# Lightweight match result; DataFrame/CSV are optional views
+class GunaMilanResult:
+    __slots__ = ("scores", "girl_labels", "boy_labels", "total")
+    def __init__(self, scores, girl_labels, boy_labels):
+        self.scores = tuple(scores)
+        self.girl_labels = tuple(girl_labels)
+        self.boy_labels = tuple(boy_labels)
+        self.total = sum(self.scores)
+    def __getitem__(self, koota):
+        return self.scores[koota_names.index(koota)]
+    @property
+    def nadi(self):
+        return self.scores[7]
+    def rows(self, decorate=False):
+        for i, koota in enumerate(koota_names):
+            score = self.scores[i]
+            area = area_of_life[koota]
+            if decorate:
+                score = format_points(score)
+                area = f"{area_emojis[area]} {area}"
+            yield (i + 1, f"{guna_emojis[koota]} {koota}", self.girl_labels[i], self.boy_labels[i], score, max_points[koota], area)
+    def to_dataframe(self, decorate=False):
+        return pd.DataFrame(list(self.rows(decorate)), columns=guna_columns)
+    def to_csv(self, decorate=True):
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(guna_columns)
+        writer.writerows(self.rows(decorate))
+        writer.writerow(['', 'Total Guna Milan Points', '', '', self.total, 36, ''])
+        return buf.getvalue()
 def calculate_guna_milan(n_b, r_b, n_g, r_g):
-    data = []
-    i = 1
-    # Varna
-    v_b = varna_rashi[r_b]
-    v_g = varna_rashi[r_g]
-    score = varna_score(r_b, r_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Varna Koot']} Varna Koot", "Girl 👰": varna_names[v_b], "Boy 🤵": varna_names[v_g], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Varna Koot"], "Area Of Life 🌍": area_of_life["Varna Koot"]})
-    i += 1
-    # Vashya
-    vb = vashya_types[r_b]
-    vg = vashya_types[r_g]
-    score = vashya_score(r_b, r_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Vashya Koot']} Vashya Koot", "Girl 👰": vashya_names[vb], "Boy 🤵": vashya_names[vg], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Vashya Koot"], "Area Of Life 🌍": area_of_life["Vashya Koot"]})
-    i += 1
-    # Tara
-    score = tara_score(n_b, n_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Tara Koot']} Tara Koot", "Girl 👰": nak_names[n_b-1], "Boy 🤵": nak_names[n_g-1], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Tara Koot"], "Area Of Life 🌍": area_of_life["Tara Koot"]})
-    i += 1
-    # Yoni
     y_b = yoni_map[n_b]
     y_g = yoni_map[n_g]
-    score = yoni_score(n_b, n_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Yoni Koot']} Yoni Koot", "Girl 👰": yoni_names[y_b], "Boy 🤵": yoni_names[y_g], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Yoni Koot"], "Area Of Life 🌍": area_of_life["Yoni Koot"]})
-    i += 1
-    # Graha Maitri
-    lb = rashi_lords[r_b]
-    lg = rashi_lords[r_g]
-    score = graha_maitri_score(r_b, r_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Graha Maitri']} Graha Maitri", "Girl 👰": planet_names[lb], "Boy 🤵": planet_names[lg], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Graha Maitri"], "Area Of Life 🌍": area_of_life["Graha Maitri"]})
-    i += 1
-    # Gana
-    gb = gana_nak[n_b-1]
-    gg = gana_nak[n_g-1]
-    score = gana_score(n_b, n_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Gana Koot']} Gana Koot", "Girl 👰": gana_names[gb-1], "Boy 🤵": gana_names[gg-1], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Gana Koot"], "Area Of Life 🌍": area_of_life["Gana Koot"]})
-    i += 1
-    # Bhakoot
-    score = bhakoot_score(r_b, r_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Bhakoot Koot']} Bhakoot Koot", "Girl 👰": rashi_names[r_b], "Boy 🤵": rashi_names[r_g], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Bhakoot Koot"], "Area Of Life 🌍": area_of_life["Bhakoot Koot"]})
-    i += 1
-    # Nadi
-    na_b = nadi_nak[n_b-1]
-    na_g = nadi_nak[n_g-1]
-    score = nadi_score(n_b, n_g)
-    data.append({"#": i, "Guna": f"{guna_emojis['Nadi Koot']} Nadi Koot", "Girl 👰": nadi_names[na_b-1], "Boy 🤵": nadi_names[na_g-1], "Obtained Point 🎯": score, "Maximum Point 📈": max_points["Nadi Koot"], "Area Of Life 🌍": area_of_life["Nadi Koot"]})
-    df = pd.DataFrame(data)
-    total = df["Obtained Point 🎯"].sum()
-    return df, total
+    scores = (
+        varna_score(r_b, r_g),
+        vashya_score(r_b, r_g),
+        tara_score(n_b, n_g),
+        yoni_score(n_b, n_g),
+        graha_maitri_score(r_b, r_g),
+        gana_score(n_b, n_g),
+        bhakoot_score(r_b, r_g),
+        nadi_score(n_b, n_g),
+    )
+    girl_labels = (
+        varna_names[varna_rashi[r_b]],
+        vashya_names[vashya_types[r_b]],
+        nak_names[n_b-1],
+        yoni_names[y_b],
+        planet_names[rashi_lords[r_b]],
+        gana_names[gana_nak[n_b-1]-1],
+        rashi_names[r_b],
+        nadi_names[nadi_nak[n_b-1]-1],
+    )
+    boy_labels = (
+        varna_names[varna_rashi[r_g]],
+        vashya_names[vashya_types[r_g]],
+        nak_names[n_g-1],
+        yoni_names[y_g],
+        planet_names[rashi_lords[r_g]],
+        gana_names[gana_nak[n_g-1]-1],
+        rashi_names[r_g],
+        nadi_names[nadi_nak[n_g-1]-1],
+    )
+    return GunaMilanResult(scores, girl_labels, boy_labels)
 # Manglik with exceptions
 dosha_houses = [1,2,4,7,8,12]
 exception_rashis = {
@@ -527,6 +592,109 @@ def calculate_dasha(jd_birth, nak_index, nirayana_moon, jd_current):
         ad_dur = (dasha_years[md_lord] * dasha_years[j]) / 120
     ad_lord = j
     return md_lord, ad_lord
+def get_dasha_timeline(jd_birth, nak_index, nirayana_moon):
+    nak_deg = 360 / 27
+    fraction_passed = (nirayana_moon % nak_deg) / nak_deg
+    i = nak_lords[nak_index - 1]
+    start = jd_birth
+    end = jd_birth + dasha_years[i] * (1 - fraction_passed) * 365.25
+    timeline = []
+    for _ in range(9):
+        timeline.append((i, start, end))
+        i = (i + 1) % 9
+        start = end
+        end = start + dasha_years[i] * 365.25
+    return timeline
+# Streaming report export
+match_schema = [("pair_id", "int64"), ("bride_name", "string"), ("groom_name", "string"),
+                ("varna", "float64"), ("vashya", "float64"), ("tara", "float64"), ("yoni", "float64"),
+                ("graha_maitri", "float64"), ("gana", "float64"), ("bhakoot", "float64"), ("nadi", "float64"),
+                ("total", "float64"), ("bride_manglik", "bool"), ("groom_manglik", "bool")]
+chart_schema = [("pair_id", "int64"), ("person", "string"), ("chart", "string"), ("planet", "string"),
+                ("longitude", "float64"), ("rashi", "string"), ("nakshatra", "string")]
+dasha_schema = [("pair_id", "int64"), ("person", "string"), ("mahadasha", "string"),
+                ("start_jd", "float64"), ("end_jd", "float64")]
+transit_schema = [("user_id", "string"), ("jd", "float64")] + \
+                 [(f"{p.lower()}_house", "int64") for p in transit_planets] + \
+                 [("sade_sati", "bool"), ("jupiter_favourable", "bool")]
+def arrow_schema(schema):
+    types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(), "bool": pa.bool_()}
+    return pa.schema([(name, types[t]) for name, t in schema])
+class ReportWriter:
+    # Buffers at most chunk_size rows; each flush becomes a CSV block, Parquet row group or Arrow record batch
+    def __init__(self, sink, schema, fmt="csv", chunk_size=50000):
+        if fmt not in ("csv", "parquet", "arrow"):
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if fmt != "csv" and pa is None:
+            raise ImportError("pyarrow is required for Parquet/Arrow export")
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.rows = []
+        self._own_file = False
+        if fmt == "csv":
+            if isinstance(sink, str):
+                sink = open(sink, "w", newline="", encoding="utf-8")
+                self._own_file = True
+            self._file = sink
+            self._writer = csv.writer(sink, lineterminator="\n")
+            self._writer.writerow([name for name, _ in schema])
+        else:
+            self._schema = arrow_schema(schema)
+            if fmt == "parquet":
+                self._writer = pq.ParquetWriter(sink, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(sink, self._schema)
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+    def flush(self):
+        if not self.rows:
+            return
+        if self.fmt == "csv":
+            self._writer.writerows(self.rows)
+        else:
+            columns = [pa.array(col, type=field.type) for col, field in zip(zip(*self.rows), self._schema)]
+            self._writer.write_batch(pa.record_batch(columns, schema=self._schema))
+        self.rows = []
+    def close(self):
+        self.flush()
+        if self.fmt != "csv":
+            self._writer.close()
+        elif self._own_file:
+            self._file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+def export_match_report(pairs, match_sink, chart_sink, dasha_sink, fmt="csv", chunk_size=50000):
+    # pairs: iterable of (bride_name, bride_details, groom_name, groom_details), details being get_astro_details args
+    count = 0
+    with ReportWriter(match_sink, match_schema, fmt, chunk_size) as match_w, \
+         ReportWriter(chart_sink, chart_schema, fmt, chunk_size) as chart_w, \
+         ReportWriter(dasha_sink, dasha_schema, fmt, chunk_size) as dasha_w:
+        for pair_id, (bride_name, bride_details, groom_name, groom_details) in enumerate(pairs):
+            b_result = get_astro_details(*bride_details)
+            g_result = get_astro_details(*groom_details)
+            if b_result is None or g_result is None:
+                continue
+            manglik = []
+            for person, res in (("bride", b_result), ("groom", g_result)):
+                jd, nak, r, moon, mars, lagna, l_r, birth_chart, aspects, d9, d10 = res
+                for chart_name, chart in (("D1", birth_chart), ("D9", d9), ("D10", d10)):
+                    for planet, (long, (rashi, nakshatra)) in chart.items():
+                        chart_w.write((pair_id, person, chart_name, planet, long, rashi, nakshatra))
+                for lord, start, end in get_dasha_timeline(jd, nak, moon):
+                    dasha_w.write((pair_id, person, lord_names[lord], start, end))
+                manglik.append(is_manglik(math.floor(mars / 30), l_r, r))
+            result = calculate_guna_milan(b_result[1], b_result[2], g_result[1], g_result[2])
+            match_w.write((pair_id, bride_name, groom_name, *map(float, result.scores), float(result.total), *manglik))
+            count += 1
+    return count
+def export_transit_forecast(forecast, sink, user_ids=None, fmt="csv", chunk_size=50000):
+    with ReportWriter(sink, transit_schema, fmt, chunk_size) as writer:
+        for row in forecast.rows(user_ids):
+            writer.write(row)
 # Streamlit App
 st.title("Advanced Kundali Matching App ✨🔮")
 st.write("Accurate Vedic Ashtakoota, Manglik with exceptions, Vimshottari Dasha & Antardasha. Let's unlock the stars! 🌟")
@@ -603,14 +771,13 @@ if st.button("Calculate Compatibility 💫"):
             st.subheader("What is Manglik Dosha? 🔍")
             st.write("Manglik Dosha, also known as Mangal Dosha, is a concept in Vedic astrology where the planet Mars (Mangal) is positioned in certain houses (typically 1st, 2nd, 4th, 7th, 8th, or 12th) in a person's birth chart, potentially leading to challenges in marriage, such as conflicts, delays, or even health issues for the spouse. It is believed to create an imbalance of fiery energy that can affect marital harmony. While not everyone with this dosha experiences negative effects (as it depends on the overall chart), many seek remedies to mitigate its influence.")
        
-        df, total = calculate_guna_milan(b_nak, b_r, g_nak, g_r)
-        df['Obtained Point 🎯'] = df['Obtained Point 🎯'].apply(lambda x: int(x) if x == int(x) else x)
-        df['Area Of Life 🌍'] = df['Area Of Life 🌍'].apply(lambda x: f"{area_emojis.get(x, '')} {x}")
+        result = calculate_guna_milan(b_nak, b_r, g_nak, g_r)
+        total = result.total
         st.write("### Guna Milan (Ashtakoot Points) 📊🌟")
-        st.table(df)
+        st.table(result.to_dataframe(decorate=True))
         st.write(f"**Total Guna Milan Points: {total}/36 💖**")
        
-        nadi_score_val = df.loc[df['Guna'] == f"{guna_emojis['Nadi Koot']} Nadi Koot", 'Obtained Point 🎯'].values[0]
+        nadi_score_val = result.nadi
         if nadi_score_val == 0:
             st.warning("Union is not recommended due to the presence of Nadi Maha Dosha. ⚠️")
             st.subheader("What is Nadi Dosha? 🔍")
@@ -679,11 +846,10 @@ if st.button("Calculate Compatibility 💫"):
             "Bhakoot Koot": "Emotional & family flow! 👨‍👩‍👧‍👦💕 Rashi positions for love, wealth & kids—auspicious ones build strong homes. Max 7 pts. 🏠",
             "Nadi Koot": "Health, genes & progeny pulse! 👶🩺 Energy channels—different Nadis prevent health woes & bless with healthy heirs. Max 8 pts. ⚡"
         }
-        for index, row in df.iterrows():
-            koota = row["Guna"].split(' ', 1)[1] # Remove emoji from key
-            score = row["Obtained Point 🎯"]
+        for _, guna, _, _, score, max_pt, _ in result.rows(decorate=True):
+            koota = guna.split(' ', 1)[1] # Remove emoji from key
             exp = explanations.get(koota, "Cosmic mystery! 🔮")
-            st.markdown(f"**{row['Guna']} ({score}/{row['Maximum Point 📈']}) 🎪:** {exp}")
+            st.markdown(f"**{guna} ({score}/{max_pt}) 🎪:** {exp}")
        
         # Remedies
         if total < 18 or not mang_compat or nadi_score_val == 0:
@@ -710,9 +876,5 @@ if st.button("Calculate Compatibility 💫"):
             st.write("- Consult a guru for personalized mantras. 👩‍🏫🔮")
        
         # Export
-        export_df = df.copy()
-        export_df.loc[len(export_df)] = ['', 'Total Guna Milan Points', '', '', total, 36, '']
-        buf = io.StringIO()
-        export_df.to_csv(buf, index=False)
-        st.download_button("Download Cosmic Report CSV 📥", buf.getvalue().encode(), "kundali.csv")
+        st.download_button("Download Cosmic Report CSV 📥", result.to_csv().encode(), "kundali.csv")
 st.info("Enter details and calculate your starry fate! 🌠💫")